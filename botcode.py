@@ -5,17 +5,19 @@ Automatically collects free Udemy courses and posts them to a Telegram channel
 
 import asyncio
 import sqlite3
+import threading
 import time
 import logging
 import sys
 import re
 import html
-from typing import List, Dict, Optional
-import requests
-from bs4 import BeautifulSoup
-from telegram import Bot
+from collections import OrderedDict
+from typing import Callable, List, Dict, Optional
+import httpx
+from lxml import etree, html as lxml_html
 from telegram.error import TelegramError
-from telegram.ext import Application, CommandHandler, ContextTypes
+from telegram.request import HTTPXRequest
+from telegram.ext import AIORateLimiter, Application, CommandHandler, ContextTypes, ExtBot
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
@@ -26,7 +28,15 @@ from apscheduler.triggers.interval import IntervalTrigger
 TELEGRAM_BOT_TOKEN = "YOUR_BOT_TOKEN_HERE"  # Get from @BotFather on Telegram
 TELEGRAM_CHANNEL_ID = "@your_channel"  # Your channel username (e.g., @myudemycourses) or channel ID (e.g., -1001234567890)
 SCRAPE_INTERVAL_MINUTES = 5  # How often to check for new courses (in minutes)
+SCRAPE_REUSE_SECONDS = 60  # A scrape this recent is reused instead of scraping again (e.g., /test right after a run)
+WEBHOOK_URL = ""  # Public HTTPS URL for receiving commands by webhook (e.g., https://example.com), empty to use polling
+WEBHOOK_PORT = 8443  # Local port the webhook server listens on (only used with WEBHOOK_URL)
 REQUEST_TIMEOUT = 15  # Timeout for HTTP requests (in seconds)
+SCRAPER_CONCURRENCY = 16  # Max course pages fetched in parallel
+SCRAPER_CACHE_SIZE = 4096  # Max course pages / Udemy URLs remembered between runs
+SCRAPER_CACHE_TTL = 3600  # Seconds a remembered course page / Udemy URL stays valid (coupons expire)
+POST_CONCURRENCY = 3  # Max Telegram posts sent at the same time
+POST_MAX_RETRIES = 3  # Times a post is retried when Telegram asks the bot to slow down
 DB_PATH = "posted_courses.db"  # SQLite database file
 COUPONAMI_URL = "https://www.couponami.com/all"  # Only track courses from this URL
 
@@ -40,6 +50,87 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# ============================================================================
+# PRECOMPILED PATTERNS
+# ============================================================================
+
+_URL_STRIP_RE = re.compile(r'[?#].*$')  # Query params and fragments
+_NORMALIZE_RE = re.compile(r'[^\w\s]')  # Special characters in titles
+_SLUG_RE = re.compile(r'/course/([^/?]+)')  # Udemy course slug
+_CATEGORY_LINK_RE = re.compile(r'/(marketing|development|design|business|it-software|personal-development|photography|music|teaching|academic|graphic-design|3d-model|ethical-hacking|after-effects|network-security|python|data-science|web-development|mobile-development|cloud|devops|cybersecurity|ai|machine-learning|blockchain|game-development|ui-ux|video-editing|animation|writing|finance|health|fitness|language|programming|database|software-engineering|testing|automation)/')  # Couponami category paths
+_CONTAINER_CLASS_RE = re.compile(r'course|card|item|post|deal|coupon', re.I)  # Course card classes
+_COURSE_PATH_RE = re.compile(r'^/[^/]+/[^/]+')  # Paths like /something/something
+# Course pages on the aggregator itself (/category/slug), the only pages that list course details
+_COURSE_PAGE_RE = re.compile(r'^https?://www\.(?:couponami|discudemy)\.com/[^/?#]+/[^/?#]+/?(?:[?#]|$)')
+# Navigation and footer links in course containers that are never courses
+# (one scan instead of a substring per word)
+_SKIP_LINK_RE = re.compile(
+    r'#|javascript:|mailto:|tel:'
+    r'|/(?:tag|category|author|page)/'
+    r'|/(?:search|about|contact|privacy|terms)',
+    re.I
+)
+# Navigation, account and asset paths among all page links that are never courses
+_SKIP_PATH_RE = re.compile(
+    r'/(?:tag|category|author|page|static|assets|css|js|img|images)/'
+    r'|/(?:search|about|contact|privacy|terms|login|register|wp-)',
+    re.I
+)
+_PRICE_TEXT_RE = re.compile(r'\$[\d,]+.*?$')  # Trailing price text
+_VIEW_COUNT_RE = re.compile(r'\d+\s*(views?|enrolls?|students?)', re.I)  # View/enroll counts
+# Course page details, the name of the outermost matched group says which one was found
+_COURSE_DETAILS_RE = re.compile(
+    r'Language\s*:\s*(?P<language>\w+)'
+    r'|Publisher\s*:\s*(?P<publisher>[^\n]+)'
+    r'|Rate\s*:\s*(?P<rate>[\d.]+)'
+    r'|Enroll\s*:\s*(?P<enroll>[\d,]+)'
+    r'|Price\s*:\s*(?P<price>\$?(?P<original_price>[\d,]+)\s*->\s*\$?(?P<current_price>[\d,]+))',
+    re.I
+)
+# Buttons searched for on /go/ pages
+_BUTTON_CLASS_RE = re.compile(r'button|btn|get|course')  # Button-like link classes
+_ONCLICK_URL_RE = re.compile(r'https?://[^\s\'"]*udemy\.com[^\s\'"]*')  # Udemy URL in an onclick handler
+
+# Every ASCII character _NORMALIZE_RE would remove, so ASCII titles can be normalized
+# with a single bytes.translate pass instead of the regex engine
+_TITLE_DELETE_BYTES = bytes(
+    c for c in range(128) if not (chr(c).isalnum() or chr(c) == '_' or chr(c).isspace())
+)
+
+# Heading tags that may hold a course title
+_HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+# Elements that start a new line of page text (inline tags like <b> or <a> don't)
+_BLOCK_TAGS = frozenset((
+    'address', 'article', 'aside', 'blockquote', 'body', 'dd', 'details', 'dialog', 'div',
+    'dl', 'dt', 'fieldset', 'figcaption', 'figure', 'footer', 'form', 'header', 'hr', 'html',
+    'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'summary', 'table', 'tbody', 'td',
+    'tfoot', 'th', 'thead', 'tr', 'ul', *_HEADING_TAGS
+))
+# Links under an element, compiled once instead of re-parsing the expression on every call
+_LINKS_XPATH = etree.XPath('.//a[@href]')
+# "Get Course" links to the /go/ redirect, and links to Udemy, on course and /go/ pages
+_GO_LINKS_XPATH = etree.XPath('//a[contains(@href, "/go/")]')
+_UDEMY_LINKS_XPATH = etree.XPath('//a[contains(@href, "udemy.com")]')
+# Every visible text node of a page (not scripts, styles or comments)
+_PAGE_TEXT_XPATH = etree.XPath('//text()[not(ancestor::script or ancestor::style or ancestor::template)]')
+
+# ============================================================================
+# SQL STATEMENTS
+# ============================================================================
+
+_SQL_INSERT_COURSE = '''
+    INSERT OR IGNORE INTO posted_courses 
+    (course_title, coupon_link, udemy_url, posted_at, source, normalized_title, udemy_slug)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+_SQL_CHECK_TITLE = 'SELECT 1 FROM posted_courses WHERE normalized_title = ? LIMIT 1'
+_SQL_RECENT = '''
+    SELECT course_title, coupon_link, udemy_url 
+    FROM posted_courses 
+    ORDER BY posted_at DESC 
+    LIMIT ?
+'''
+
 # ============================================================================
 # DATABASE CLASS
 # ============================================================================
@@ -49,150 +140,268 @@ class CourseDatabase:
     
     def __init__(self, db_path: str = DB_PATH):
         self.db_path = db_path
+        # One long-lived connection reused by every method; the lock serializes
+        # access so async callers can run these methods via asyncio.to_thread
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # In-memory copies of the stored coupon links and Udemy slugs, this process is the
+        # only writer so a miss here is authoritative and needs no database round-trip
+        self._coupon_set = set()
+        self._slug_set = set()
         self.init_db()
     
     def init_db(self):
         """Initialize the database with required tables"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS posted_courses (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    course_title TEXT NOT NULL,
-                    coupon_link TEXT UNIQUE NOT NULL,
-                    udemy_url TEXT,
-                    posted_at INTEGER NOT NULL,
-                    source TEXT
-                )
-            ''')
-            conn.commit()
-            conn.close()
-            logger.info("Database initialized successfully")
+            with self._lock:
+                # Per-connection tuning, set once on the shared connection: WAL lets
+                # lookups read while a batch is being written, and temp sorts stay in RAM
+                self._conn.executescript('''
+                    PRAGMA journal_mode=WAL;
+                    PRAGMA synchronous=NORMAL;
+                    PRAGMA temp_store=MEMORY;
+                    PRAGMA mmap_size=268435456;
+                    PRAGMA cache_size=-20000;
+                ''')
+                
+                with self._conn:
+                    c = self._conn.cursor()
+                    c.execute('''
+                        CREATE TABLE IF NOT EXISTS posted_courses (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            course_title TEXT NOT NULL,
+                            coupon_link TEXT UNIQUE NOT NULL,
+                            udemy_url TEXT,
+                            posted_at INTEGER NOT NULL,
+                            source TEXT,
+                            normalized_title TEXT,
+                            udemy_slug TEXT
+                        )
+                    ''')
+                    
+                    # Migrate databases created before the lookup columns existed
+                    columns = {row[1] for row in c.execute('PRAGMA table_info(posted_courses)')}
+                    for column in ('normalized_title', 'udemy_slug'):
+                        if column not in columns:
+                            c.execute(f'ALTER TABLE posted_courses ADD COLUMN {column} TEXT')
+                    
+                    # Strip query params and fragments from coupon links stored before they were normalized
+                    c.execute("SELECT id, coupon_link FROM posted_courses WHERE instr(coupon_link, '?') OR instr(coupon_link, '#')")
+                    backfill = [(_URL_STRIP_RE.sub('', link), row_id) for row_id, link in c.fetchall()]
+                    if backfill:
+                        # OR IGNORE keeps the old row if its normalized link is already stored
+                        c.executemany('UPDATE OR IGNORE posted_courses SET coupon_link = ? WHERE id = ?', backfill)
+                        if c.rowcount:
+                            logger.info(f"Normalized coupon links for {c.rowcount} courses")
+                    
+                    # Backfill normalized titles for rows that don't have one yet
+                    c.execute('SELECT id, course_title FROM posted_courses WHERE normalized_title IS NULL')
+                    backfill = [(self._normalize_title(title), row_id) for row_id, title in c.fetchall()]
+                    if backfill:
+                        c.executemany('UPDATE posted_courses SET normalized_title = ? WHERE id = ?', backfill)
+                        logger.info(f"Backfilled normalized titles for {len(backfill)} courses")
+                    
+                    # Backfill Udemy course slugs for rows that don't have one yet
+                    c.execute('SELECT id, udemy_url FROM posted_courses WHERE udemy_slug IS NULL AND udemy_url IS NOT NULL')
+                    backfill = []
+                    for row_id, url in c.fetchall():
+                        slug = self._extract_slug(url)
+                        if slug:
+                            backfill.append((slug, row_id))
+                    if backfill:
+                        c.executemany('UPDATE posted_courses SET udemy_slug = ? WHERE id = ?', backfill)
+                        logger.info(f"Backfilled Udemy slugs for {len(backfill)} courses")
+                    
+                    c.execute('CREATE INDEX IF NOT EXISTS idx_norm_title ON posted_courses(normalized_title)')
+                    # Not UNIQUE: /test_scrape may already have stored the same course under two coupon links
+                    c.execute('CREATE INDEX IF NOT EXISTS idx_slug ON posted_courses(udemy_slug)')
+                    # Covering index so get_recent_courses is served entirely from the index, newest first
+                    c.execute('''
+                        CREATE INDEX IF NOT EXISTS idx_recent_cover
+                        ON posted_courses(posted_at DESC, course_title, coupon_link, udemy_url)
+                    ''')
+                
+                for coupon_link, udemy_slug in self._conn.execute('SELECT coupon_link, udemy_slug FROM posted_courses'):
+                    self._coupon_set.add(coupon_link)
+                    if udemy_slug:
+                        self._slug_set.add(udemy_slug)
+            logger.info(f"Database initialized successfully ({len(self._coupon_set)} posted courses)")
         except Exception as e:
             logger.error(f"Error initializing database: {e}")
+            # Without the posted-course sets every course would look new and be reposted
+            raise
     
-    def is_posted(self, coupon_link: str, udemy_url: str = None, course_title: str = None) -> bool:
-        """Check if a course has already been posted (by coupon_link, udemy_url, or course title)"""
-        conn = None
+    def close(self):
+        """Close the shared database connection"""
+        with self._lock:
+            self._conn.close()
+    
+    @staticmethod
+    def _normalize_title(title: str) -> str:
+        """Normalize a course title for duplicate matching (lowercase, no special chars)"""
+        if not title:
+            return ''
+        title = title.lower().strip()
+        if title.isascii():
+            return title.encode('ascii').translate(None, _TITLE_DELETE_BYTES).decode('ascii')
+        return _NORMALIZE_RE.sub('', title)
+    
+    @staticmethod
+    def _extract_slug(udemy_url: str) -> Optional[str]:
+        """Extract the course slug from a Udemy URL (e.g., "python-hacking-course")"""
+        if not udemy_url:
+            return None
+        normalized_udemy = _URL_STRIP_RE.sub('', udemy_url)
+        course_slug_match = _SLUG_RE.search(normalized_udemy)
+        return course_slug_match.group(1) if course_slug_match else None
+    
+    def is_posted(self, coupon_link: str, udemy_url: str = None, course_title: str = None, *,
+                  strict_title_check: bool = False) -> bool:
+        """Check if a course has already been posted (by coupon_link, udemy_url, or course title)
+        
+        The title is only compared when no URL is given or strict_title_check is set.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            
-            # Method 1: Check by exact coupon_link (normalize URL first)
-            if coupon_link:
-                # Normalize coupon_link for comparison (remove query params and fragments)
-                normalized_coupon = re.sub(r'[?#].*$', '', coupon_link)
-                c.execute('SELECT 1 FROM posted_courses WHERE coupon_link = ? OR coupon_link LIKE ?', 
-                         (coupon_link, f'{normalized_coupon}%'))
-                if c.fetchone() is not None:
-                    logger.debug(f"Duplicate found by coupon_link: {coupon_link[:50]}...")
-                    return True
-            
-            # Method 2: Check by Udemy URL (extract course slug)
-            if udemy_url:
-                # Normalize Udemy URL first
-                normalized_udemy = re.sub(r'[?#].*$', '', udemy_url)
-                # Extract course slug from Udemy URL (e.g., "python-hacking-course" from full URL)
-                course_slug_match = re.search(r'/course/([^/?]+)', normalized_udemy)
-                if course_slug_match:
-                    course_slug = course_slug_match.group(1)
-                    # Check if any posted course has the same slug
-                    c.execute('SELECT udemy_url FROM posted_courses WHERE udemy_url LIKE ?', (f'%{course_slug}%',))
-                    if c.fetchone() is not None:
-                        logger.debug(f"Duplicate found by Udemy course slug: {course_slug}")
-                        return True
-            
-            # Method 3: Check by course title (normalized - remove special chars, lowercase)
-            if course_title:
-                # Normalize title for comparison
-                normalized_title = re.sub(r'[^\w\s]', '', course_title.lower().strip())
-                if len(normalized_title) > 10:  # Only check if title is meaningful
-                    # Get all posted course titles and compare
-                    c.execute('SELECT course_title FROM posted_courses')
-                    posted_titles = c.fetchall()
-                    for (posted_title,) in posted_titles:
-                        if posted_title:
-                            normalized_posted = re.sub(r'[^\w\s]', '', posted_title.lower().strip())
-                            # Check if titles are very similar (90% match or more)
-                            if normalized_title == normalized_posted or \
-                               (len(normalized_title) > 20 and normalized_title in normalized_posted) or \
-                               (len(normalized_posted) > 20 and normalized_posted in normalized_title):
-                                logger.debug(f"Duplicate found by course title: {course_title[:50]}...")
-                                return True
-            
-            return False
+            with self._lock:
+                return self._is_posted_locked(coupon_link, udemy_url, course_title, strict_title_check)
         except Exception as e:
             logger.error(f"Error checking if course is posted: {e}", exc_info=True)
             return False
-        finally:
-            if conn:
-                try:
-                    conn.close()
-                except:
-                    pass
+    
+    def is_coupon_posted(self, coupon_link: str) -> bool:
+        """Check a coupon link against the in-memory set only, without taking the lock
+        
+        Never blocks behind a write, so it is safe to call from the event loop
+        (a single set lookup is atomic, writers only ever add to the set).
+        """
+        return bool(coupon_link) and _URL_STRIP_RE.sub('', coupon_link) in self._coupon_set
+    
+    def filter_already_posted(self, courses: List[Dict]) -> set:
+        """Return the indexes of the courses that have already been posted
+        
+        Runs the is_posted checks for every course under a single lock acquisition.
+        """
+        posted = set()
+        try:
+            with self._lock:
+                for index, course in enumerate(courses):
+                    if self._is_posted_locked(course.get('coupon_link'), course.get('udemy_url'), course.get('title')):
+                        posted.add(index)
+        except Exception as e:
+            logger.error(f"Error checking which courses are posted: {e}", exc_info=True)
+        return posted
+    
+    def _is_posted_locked(self, coupon_link: str, udemy_url: str = None, course_title: str = None,
+                          strict_title_check: bool = False) -> bool:
+        """is_posted without the locking and error handling (caller holds the lock)"""
+        # Method 1: Check by exact coupon_link (normalize URL first)
+        if coupon_link:
+            # Stored links are always normalized, so a set lookup is enough
+            normalized_coupon = _URL_STRIP_RE.sub('', coupon_link)
+            if normalized_coupon in self._coupon_set:
+                logger.debug(f"Duplicate found by coupon_link: {coupon_link[:50]}...")
+                return True
+        
+        # Method 2: Check by Udemy URL (extract course slug)
+        if udemy_url:
+            course_slug = self._extract_slug(udemy_url)
+            if course_slug and course_slug in self._slug_set:
+                logger.debug(f"Duplicate found by Udemy course slug: {course_slug}")
+                return True
+        
+        # Method 3: Check by course title (normalized - remove special chars, lowercase)
+        # Only used when there is no URL to identify the course (or the caller asks
+        # for it), the lookups above already cover every course that has a link
+        if course_title and (strict_title_check or not (coupon_link or udemy_url)):
+            normalized_title = self._normalize_title(course_title)
+            if len(normalized_title) > 10:  # Only check if title is meaningful
+                # Indexed lookup on the stored normalized title
+                if self._conn.execute(_SQL_CHECK_TITLE, (normalized_title,)).fetchone() is not None:
+                    logger.debug(f"Duplicate found by course title: {course_title[:50]}...")
+                    return True
+        
+        return False
+    
+    def _course_row(self, course_title: str, coupon_link: str, udemy_url: str = None, source: str = None,
+                    posted_at: int = None) -> tuple:
+        """Build a posted_courses row with normalized URLs and lookup columns"""
+        # Normalize URLs before storing (remove query params and fragments for consistency)
+        normalized_coupon = _URL_STRIP_RE.sub('', coupon_link) if coupon_link else None
+        normalized_udemy = _URL_STRIP_RE.sub('', udemy_url) if udemy_url else None
+        return (course_title, normalized_coupon or coupon_link, normalized_udemy or udemy_url,
+                posted_at or int(time.time()), source,
+                self._normalize_title(course_title), self._extract_slug(udemy_url))
+    
+    def _remember(self, row: tuple):
+        """Add a newly inserted row to the in-memory lookup sets (caller holds the lock)"""
+        self._coupon_set.add(row[1])
+        if row[6]:
+            self._slug_set.add(row[6])
     
     def mark_posted(self, course_title: str, coupon_link: str, udemy_url: str = None, source: str = None):
         """Mark a course as posted"""
-        conn = None
         try:
-            # Normalize URLs before storing (remove query params and fragments for consistency)
-            normalized_coupon = re.sub(r'[?#].*$', '', coupon_link) if coupon_link else None
-            normalized_udemy = re.sub(r'[?#].*$', '', udemy_url) if udemy_url else None
-            
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            
-            # Check if already exists first (prevent duplicates in database)
-            c.execute('SELECT 1 FROM posted_courses WHERE coupon_link = ? OR coupon_link LIKE ?', 
-                     (coupon_link, f'{normalized_coupon}%'))
-            if c.fetchone() is not None:
-                logger.debug(f"Course already in database: {course_title[:50]}...")
-                return
-            
-            # Insert new record (store normalized URLs)
-            c.execute('''
-                INSERT INTO posted_courses 
-                (course_title, coupon_link, udemy_url, posted_at, source)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (course_title, normalized_coupon or coupon_link, normalized_udemy or udemy_url, int(time.time()), source))
-            conn.commit()
-            logger.info(f"✅ Marked course as posted: {course_title[:50]}...")
-        except sqlite3.IntegrityError:
-            # Duplicate entry (shouldn't happen with our check, but handle it)
-            logger.warning(f"Course already exists in database: {course_title[:50]}...")
+            row = self._course_row(course_title, coupon_link, udemy_url, source)
+            
+            with self._lock:
+                with self._conn:
+                    # The UNIQUE coupon_link constraint rejects duplicates, no pre-check needed
+                    c = self._conn.execute(_SQL_INSERT_COURSE, row)
+                if c.rowcount:
+                    self._remember(row)
+            if c.rowcount == 0:
+                logger.warning(f"Course already exists in database: {course_title[:50]}...")
+            else:
+                logger.info(f"✅ Marked course as posted: {course_title[:50]}...")
         except Exception as e:
             logger.error(f"Error marking course as posted: {e}", exc_info=True)
-        finally:
-            if conn:
-                try:
-                    conn.close()
-                except:
-                    pass
+    
+    def mark_posted_many(self, courses: List[Dict]) -> int:
+        """Mark several courses as posted in a single transaction, returns the number of new rows"""
+        posted_at = int(time.time())
+        rows = [
+            self._course_row(course.get('title', 'Unknown'), course['coupon_link'], course.get('udemy_url'),
+                             course.get('source'), posted_at)
+            for course in courses if course.get('coupon_link')
+        ]
+        if not rows:
+            return 0
+        
+        try:
+            # One transaction (and one fsync) for the whole batch; the UNIQUE
+            # coupon_link constraint silently skips courses already stored
+            with self._lock:
+                inserted_rows = []
+                with self._conn:
+                    c = self._conn.cursor()
+                    # Row by row (still one transaction) to learn which rows were new
+                    for row in rows:
+                        c.execute(_SQL_INSERT_COURSE, row)
+                        if c.rowcount:
+                            inserted_rows.append(row)
+                for row in inserted_rows:
+                    self._remember(row)
+                inserted = len(inserted_rows)
+            logger.info(f"✅ Marked {inserted} courses as posted ({len(rows) - inserted} already in database)")
+            return inserted
+        except Exception as e:
+            logger.error(f"Error marking courses as posted: {e}", exc_info=True)
+            return 0
     
     def get_recent_courses(self, limit: int = 10) -> List[Dict]:
         """Get the most recent posted courses"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute('''
-                SELECT course_title, coupon_link, udemy_url 
-                FROM posted_courses 
-                ORDER BY posted_at DESC 
-                LIMIT ?
-            ''', (limit,))
-            results = c.fetchall()
-            conn.close()
-            
-            courses = []
-            for row in results:
-                courses.append({
-                    'title': row[0],
-                    'coupon_link': row[1],
-                    'udemy_url': row[2] if row[2] else '',
-                    'thumbnail': None  # Thumbnail not stored in DB, will use None
-                })
-            return courses
+            with self._lock:
+                # Build the dicts straight from the cursor instead of fetchall() + a second loop
+                return [
+                    {
+                        'title': title,
+                        'coupon_link': coupon_link,
+                        'udemy_url': udemy_url or '',
+                        'thumbnail': None  # Thumbnail not stored in DB, will use None
+                    }
+                    for title, coupon_link, udemy_url in self._conn.execute(_SQL_RECENT, (limit,))
+                ]
         except Exception as e:
             logger.error(f"Error getting recent courses: {e}")
             return []
@@ -204,245 +413,373 @@ class CourseDatabase:
 class UdemyScraper:
     """Scrapes free Udemy courses from various aggregator sites"""
     
-    def __init__(self, timeout: int = REQUEST_TIMEOUT):
+    def __init__(self, timeout: int = REQUEST_TIMEOUT, concurrency: int = SCRAPER_CONCURRENCY,
+                 cache_size: int = SCRAPER_CACHE_SIZE, cache_ttl: float = SCRAPER_CACHE_TTL,
+                 is_known: Optional[Callable[[str], bool]] = None):
         self.timeout = timeout
+        # Tells whether a coupon link was already posted, those courses don't need their details
+        self.is_known = is_known
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        # One client for every request so connections are pooled and kept alive,
+        # failed connection attempts are retried by the transport. HTTP/2 lets the
+        # concurrent page fetches share one connection per host, and httpx already
+        # asks for (and decodes) compressed responses
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=timeout,
+            follow_redirects=True,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=3,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=32)
+            )
+        )
+        # Caps how many course pages are fetched at the same time
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # LRU caches of successful lookups (least recently used first), so the same
+        # course page or coupon link is only fetched once per cache_ttl seconds
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._page_cache = OrderedDict()
+        self._udemy_info_cache = OrderedDict()
+    
+    async def aclose(self):
+        """Close the HTTP client"""
+        await self.client.aclose()
+    
+    def _cache_get(self, cache: OrderedDict, key: str) -> Optional[Dict]:
+        """Return a copy of a cached result and mark it as recently used"""
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            # Stale, the page (or its coupon) may have changed since
+            del cache[key]
+            return None
+        cache.move_to_end(key)
+        return dict(result)
+    
+    def _cache_put(self, cache: OrderedDict, key: str, result: Dict):
+        """Cache a result for cache_ttl seconds, evicting the least recently used one when full"""
+        cache[key] = (time.monotonic() + self.cache_ttl, dict(result))
+        cache.move_to_end(key)
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+    
+    @staticmethod
+    def _html(text: str):
+        """Parse a page with lxml (an empty page gives an empty tree)"""
+        parser = lxml_html.HTMLParser()
+        parser.feed(text)
+        return UdemyScraper._close_html(parser)
+    
+    @staticmethod
+    def _page_text(tree) -> str:
+        """The visible text of a page, with a line break between block elements and at each <br>"""
+        parts = []
+        current_block = None
+        for text in _PAGE_TEXT_XPATH(tree):
+            element = text.getparent()
+            if text.is_tail:
+                # Text after a closing tag belongs to the tag's parent
+                line_break = element.tag == 'br'
+                element = element.getparent()
+            else:
+                line_break = False
+            while element is not None and element.tag not in _BLOCK_TAGS:
+                element = element.getparent()
+            if parts and (line_break or element is not current_block):
+                parts.append('\n')
+            current_block = element
+            parts.append(text)
+        return ''.join(parts)
     
-    def scrape_couponami(self) -> List[Dict]:
+    @staticmethod
+    def _close_html(parser):
+        """Finish a feed-parse and return the tree (an empty page gives an empty tree)"""
+        # close() raises if nothing was ever fed, an empty chunk makes that a plain empty page
+        parser.feed('')
+        tree = parser.close()
+        return tree if tree is not None else etree.Element('html')
+    
+    @staticmethod
+    def _has_details_page(course_url: str) -> bool:
+        """Whether the link is an aggregator course page listing the course details"""
+        return '/go/' not in course_url and _COURSE_PAGE_RE.match(course_url) is not None
+    
+    @staticmethod
+    def _course_url(href: str) -> tuple:
+        """Build the full course URL for a listing link, plus its normalized form for deduplication
+        
+        Returns (None, None) for links that aren't site-relative or http(s).
+        """
+        href = href.strip() if href else ''
+        if href.startswith('/'):
+            # Handle both couponami.com and discudemy.com
+            if 'discudemy.com' in COUPONAMI_URL:
+                course_url = "https://www.discudemy.com" + href
+            else:
+                course_url = "https://www.couponami.com" + href
+        elif href.startswith('http://') or href.startswith('https://'):
+            course_url = href
+        else:
+            return None, None
+        
+        # Normalize URL (remove fragments, query params for comparison)
+        return course_url, course_url.partition('?')[0].partition('#')[0]
+    
+    @staticmethod
+    def _first_heading_and_img(element) -> tuple:
+        """First heading (h1-h6) and first img inside an element, found in one tree walk"""
+        heading = img = None
+        for node in element.iterdescendants('img', *_HEADING_TAGS):
+            if node.tag == 'img':
+                if img is None:
+                    img = node
+            elif heading is None:
+                heading = node
+            if heading is not None and img is not None:
+                break
+        return heading, img
+    
+    def _cached_heading_and_img(self, element, lookups: Dict) -> tuple:
+        """_first_heading_and_img, remembered per element while parsing one page"""
+        result = lookups.get(element)
+        if result is None:
+            result = lookups[element] = self._first_heading_and_img(element)
+        return result
+    
+    @staticmethod
+    def _text(element) -> str:
+        """Text content of an lxml element with whitespace collapsed"""
+        return ' '.join(element.text_content().split())
+    
+    async def scrape_couponami(self) -> List[Dict]:
         """Scrape free courses from Couponami /all page only"""
         courses = []
         try:
             url = COUPONAMI_URL
             logger.info(f"Scraping Couponami: {url}")
-            response = requests.get(url, headers=self.headers, timeout=self.timeout)
-            response.raise_for_status()
-            logger.info(f"Response status: {response.status_code}, Content length: {len(response.text)}")
-            
-            # Try lxml parser first, fallback to html.parser if lxml fails
-            try:
-                soup = BeautifulSoup(response.text, 'lxml')
-            except Exception as e:
-                logger.warning(f"lxml parser failed, trying html.parser: {e}")
-                soup = BeautifulSoup(response.text, 'html.parser')
+            # The page is fed to the parser as it downloads, so parsing overlaps with the network
+            parser = lxml_html.HTMLParser()
+            content_length = 0
+            async with self.client.stream('GET', url) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_text():
+                    parser.feed(chunk)
+                    content_length += len(chunk)
+            logger.info(f"Response status: {response.status_code}, Content length: {content_length}")
+            
+            # Picking the course links out of the tree is CPU work, run it in a worker
+            # thread so the event loop keeps serving other requests meanwhile
+            # (the tree isn't kept, so it is freed before the detail pages are fetched)
+            courses = await asyncio.to_thread(self._parse_listing, self._close_html(parser))
+            
+            # Get course details from the course pages concurrently
+            # (only real course pages: /go/ links are skipped, we'll get their details later
+            # when processing, and so are other pages and courses posted in an earlier run)
+            detail_courses = [
+                c for c in courses
+                if self._has_details_page(c['coupon_link'])
+                and not (self.is_known and self.is_known(c['coupon_link']))
+            ]
+            logger.info(f"Fetching details for {len(detail_courses)} of {len(courses)} courses")
+            results = await asyncio.gather(
+                *(self.get_course_details(c['coupon_link']) for c in detail_courses),
+                return_exceptions=True
+            )
+            for course, course_details in zip(detail_courses, results):
+                if isinstance(course_details, Exception):
+                    logger.warning(f"Could not get course details from {course['coupon_link']}: {course_details}")
+                    continue
+                course.update(course_details)
             
+            logger.info(f"Successfully scraped {len(courses)} courses from {url}")
+                    
+        except Exception as e:
+            logger.error(f"Error scraping Couponami: {e}", exc_info=True)
+        
+        return courses
+    
+    def _parse_listing(self, tree) -> List[Dict]:
+        """Find the courses on a parsed Couponami listing page (runs in a worker thread)"""
+        courses = []
+        
+        # Collect every link and its href once, Methods 1, 2 and 4 filter this list
+        # instead of re-querying the tree
+        all_links = [(link, link.get('href')) for link in _LINKS_XPATH(tree)]
+        
+        # Methods 1 and 2 sort the links in a single pass over the hrefs
+        category_links = []
+        go_links = []
+        for link, href in all_links:
             # Method 1: Find all links that look like course links (any category path)
             # Match any path that starts with / and contains course-related keywords or is a category
-            category_links = soup.find_all('a', href=re.compile(r'/(marketing|development|design|business|it-software|personal-development|photography|music|teaching|academic|graphic-design|3d-model|ethical-hacking|after-effects|network-security|python|data-science|web-development|mobile-development|cloud|devops|cybersecurity|ai|machine-learning|blockchain|game-development|ui-ux|video-editing|animation|writing|finance|health|fitness|language|programming|database|software-engineering|testing|automation)/'))
-            logger.info(f"Method 1 (category links): Found {len(category_links)} links")
-            
+            if _CATEGORY_LINK_RE.search(href):
+                category_links.append((link, href))
             # Method 2: Find /go/ links (direct coupon links)
-            go_links = soup.find_all('a', href=re.compile(r'/go/'))
-            logger.info(f"Method 2 (/go/ links): Found {len(go_links)} links")
-            
-            course_links = list(category_links)
-            course_links.extend(go_links)
-            
-            # Method 3: Find course cards/containers and extract links from them
-            # Look for common course card patterns (divs with course-related classes)
-            course_containers = soup.find_all(['div', 'article', 'section'], 
-                class_=re.compile(r'course|card|item|post|deal|coupon', re.I))
-            logger.info(f"Method 3 (course containers): Found {len(course_containers)} containers")
-            
-            container_link_count = 0
-            existing_hrefs_method3 = {l.get('href', '') for l in course_links if l.get('href')}
-            for container in course_containers:
-                # Find all links within course containers
-                container_links = container.find_all('a', href=True)
-                for link in container_links:
-                    href = link.get('href', '')
-                    if href and (href.startswith('/') or 'couponami.com' in href or 'discudemy.com' in href):
-                        # Check if it's a course link (not navigation, footer, etc.)
-                        if not any(skip in href.lower() for skip in ['#', 'javascript:', 'mailto:', 'tel:', '/tag/', '/category/', '/author/', '/page/', '/search', '/about', '/contact', '/privacy', '/terms']):
-                            # Check by href instead of object identity
-                            if href not in existing_hrefs_method3:
-                                course_links.append(link)
-                                existing_hrefs_method3.add(href)
-                                container_link_count += 1
-            logger.info(f"Method 3: Added {container_link_count} new links from containers")
-            
-            # Method 4: Find all links that contain course-related patterns
-            # Look for links that might be course pages but don't match the category pattern
-            all_links = soup.find_all('a', href=True)
-            logger.info(f"Method 4: Checking {len(all_links)} total links on page")
-            
-            existing_hrefs = {l.get('href', '') for l in course_links}
-            pattern_link_count = 0
-            for link in all_links:
+            if '/go/' in href:
+                go_links.append((link, href))
+        logger.info(f"Method 1 (category links): Found {len(category_links)} links")
+        logger.info(f"Method 2 (/go/ links): Found {len(go_links)} links")
+        
+        # Every method adds to these, so each course URL is collected once
+        course_links = []  # (course_url, link) pairs
+        seen_urls = set()  # Normalized URLs (no query params or fragments)
+        
+        for link, href in category_links + go_links:
+            course_url, normalized_url = self._course_url(href)
+            if course_url and normalized_url not in seen_urls:
+                seen_urls.add(normalized_url)
+                course_links.append((course_url, link))
+        
+        # Method 3: Find course cards/containers and extract links from them
+        # Look for common course card patterns (divs with course-related classes)
+        course_containers = [
+            el for el in tree.iter('div', 'article', 'section')
+            if _CONTAINER_CLASS_RE.search(el.get('class', ''))
+        ]
+        logger.info(f"Method 3 (course containers): Found {len(course_containers)} containers")
+        
+        container_link_count = 0
+        for container in course_containers:
+            # Find all links within course containers
+            container_links = _LINKS_XPATH(container)
+            for link in container_links:
                 href = link.get('href', '')
-                if href:
-                    # Check if it's a potential course link (has a path structure like /something/something/)
-                    if re.match(r'^/[^/]+/[^/]+', href) and href not in existing_hrefs:
-                        # Exclude common non-course paths
-                        if not any(skip in href.lower() for skip in ['/tag/', '/category/', '/author/', '/page/', '/search', '/about', '/contact', '/privacy', '/terms', '/login', '/register', '/wp-', '/static/', '/assets/', '/css/', '/js/', '/img/', '/images/']):
-                            # Check if parent element looks like a course card (has image, title, etc.)
-                            parent = link.parent
-                            if parent:
-                                # If parent has an image or looks like a course card, include it
-                                has_img = parent.find('img') is not None
-                                has_title = parent.find(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']) is not None
-                                if has_img or has_title:
-                                    course_links.append(link)
-                                    existing_hrefs.add(href)
-                                    pattern_link_count += 1
-            logger.info(f"Method 4: Added {pattern_link_count} new links from pattern matching")
-            
-            logger.info(f"Total found: {len(course_links)} potential course links")
-            
-            seen_urls = set()  # Track to avoid duplicates
-            
-            for link in course_links:
-                try:
-                    href = link.get('href', '')
-                    if not href or not isinstance(href, str):
-                        continue
-                    
-                    # Clean href
-                    href = href.strip()
-                    if not href:
-                        continue
-                    
-                    # Build full URL
-                    course_url = None
-                    if href.startswith('/'):
-                        # Handle both couponami.com and discudemy.com
-                        if 'discudemy.com' in COUPONAMI_URL:
-                            course_url = "https://www.discudemy.com" + href
-                        else:
-                            course_url = "https://www.couponami.com" + href
-                    elif href.startswith('http://') or href.startswith('https://'):
-                        course_url = href
-                    else:
-                        continue
-                    
-                    # Ensure course_url is set
-                    if not course_url:
-                        continue
-                    
-                    # Normalize URL (remove fragments, query params for comparison)
-                    normalized_url = re.sub(r'[?#].*$', '', course_url)
-                    
-                    # Skip if already seen
-                    if normalized_url in seen_urls:
-                        continue
-                    seen_urls.add(normalized_url)
-                    
-                    # Extract title - try multiple methods
-                    title = link.get_text(strip=True)
-                    
-                    # If title is empty or too short, try finding in parent elements
-                    if not title or len(title) < 5:
-                        parent = link.parent
-                        if parent:
-                            # Look for heading tags (h1-h6)
-                            title_elem = parent.find(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-                            if title_elem:
-                                title = title_elem.get_text(strip=True)
-                            else:
-                                # Look for title attribute
-                                title = link.get('title', '') or parent.get('title', '')
-                                if not title or len(title) < 5:
-                                    # Try getting text from parent, but clean it up
-                                    title = parent.get_text(strip=True)
-                                    if title:
-                                        # Remove common non-title text
-                                        title = re.sub(r'\$[\d,]+.*?$', '', title)  # Remove price
-                                        title = re.sub(r'\d+\s*(views?|enrolls?|students?)', '', title, flags=re.I)  # Remove view counts
-                                        title = re.sub(r'\s+', ' ', title).strip()  # Normalize whitespace
-                    
-                    # Try finding title in nearby elements (siblings, parent's parent)
-                    if not title or len(title) < 5:
-                        # Check parent's parent
-                        grandparent = link.parent.parent if link.parent else None
-                        if grandparent:
-                            title_elem = grandparent.find(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-                            if title_elem:
-                                title = title_elem.get_text(strip=True)
-                    
-                    # Final check - skip if still no valid title
-                    if not title or len(title) < 5:
-                        logger.debug(f"Skipping link with no valid title: {course_url[:80]}")
-                        continue
-                    
-                    # Extract thumbnail - try multiple methods
-                    thumbnail = None
-                    img_elem = link.find('img')
-                    
-                    # Try finding in parent
-                    if not img_elem:
-                        parent = link.parent
-                        if parent:
-                            img_elem = parent.find('img')
-                    
-                    # Try finding in parent's parent
-                    if not img_elem:
-                        grandparent = link.parent.parent if link.parent else None
-                        if grandparent:
-                            img_elem = grandparent.find('img')
-                    
-                    # Try finding in siblings
-                    if not img_elem and link.parent:
-                        siblings = link.parent.find_all('img')
-                        if siblings:
-                            img_elem = siblings[0]
-                    
-                    if img_elem:
-                        # Try multiple src attributes
-                        thumbnail = (img_elem.get('src') or 
-                                    img_elem.get('data-src') or 
-                                    img_elem.get('data-lazy-src') or
-                                    img_elem.get('data-original') or
-                                    img_elem.get('data-url'))
-                        
-                        if thumbnail:
-                            # Clean up thumbnail URL
-                            thumbnail = thumbnail.split('?')[0]  # Remove query params
-                            if thumbnail.startswith('/'):
-                                # Handle both couponami.com and discudemy.com
-                                if 'discudemy.com' in COUPONAMI_URL:
-                                    thumbnail = "https://www.discudemy.com" + thumbnail
-                                else:
-                                    thumbnail = "https://www.couponami.com" + thumbnail
-                            elif not thumbnail.startswith('http'):
-                                if 'discudemy.com' in COUPONAMI_URL:
-                                    thumbnail = "https://www.discudemy.com/" + thumbnail
-                                else:
-                                    thumbnail = "https://www.couponami.com/" + thumbnail
-                    
-                    # Get course details from the course page (only if it's not a /go/ link)
-                    course_details = {}
-                    if '/go/' not in course_url:
-                        course_details = self.get_course_details(course_url)
+                if href and (href.startswith('/') or 'couponami.com' in href or 'discudemy.com' in href):
+                    # Check if it's a course link (not navigation, footer, etc.)
+                    if not _SKIP_LINK_RE.search(href):
+                        course_url, normalized_url = self._course_url(href)
+                        if course_url and normalized_url not in seen_urls:
+                            seen_urls.add(normalized_url)
+                            course_links.append((course_url, link))
+                            container_link_count += 1
+        logger.info(f"Method 3: Added {container_link_count} new links from containers")
+        
+        # Method 4: Find all links that contain course-related patterns
+        # Look for links that might be course pages but don't match the category pattern
+        logger.info(f"Method 4: Checking {len(all_links)} total links on page")
+        
+        # Heading/img lookups per ancestor element, cards share ancestors and Method 4
+        # checks the same parents the extraction below uses
+        ancestor_lookups = {}
+        
+        pattern_link_count = 0
+        for link, href in all_links:
+            # Check if it's a potential course link (has a path structure like /something/something/)
+            # Exclude common non-course paths
+            if _COURSE_PATH_RE.match(href) and not _SKIP_PATH_RE.search(href):
+                course_url, normalized_url = self._course_url(href)
+                if course_url and normalized_url not in seen_urls:
+                    # Check if parent element looks like a course card (has image, title, etc.)
+                    parent = link.getparent()
+                    if parent is not None:
+                        # If parent has an image or looks like a course card, include it
+                        heading, img = self._cached_heading_and_img(parent, ancestor_lookups)
+                        if img is not None or heading is not None:
+                            seen_urls.add(normalized_url)
+                            course_links.append((course_url, link))
+                            pattern_link_count += 1
+        logger.info(f"Method 4: Added {pattern_link_count} new links from pattern matching")
+        
+        logger.info(f"Total found: {len(course_links)} potential course links")
+        
+        for course_url, link in course_links:
+            try:
+                # Extract title and thumbnail - try the link, then its parent, then the parent's parent
+                # Each ancestor is walked once for both its first heading and its first image
+                title = self._text(link)
+                img_elem = link.find('.//img')
+                
+                parent = link.getparent()
+                grandparent = parent.getparent() if parent is not None else None
+                heading = None
+                if parent is not None:
+                    heading, parent_img = self._cached_heading_and_img(parent, ancestor_lookups)
+                    if img_elem is None:
+                        img_elem = parent_img
+                
+                # If title is empty or too short, try finding in parent elements
+                if (not title or len(title) < 5) and parent is not None:
+                    # Look for heading tags (h1-h6)
+                    if heading is not None:
+                        title = self._text(heading)
                     else:
-                        # If it's a /go/ link, we'll get details later when processing
-                        logger.debug(f"Skipping details for /go/ link, will get later")
-                    
-                    courses.append({
-                        'title': title,
-                        'coupon_link': course_url,
-                        'thumbnail': thumbnail,
-                        'source': 'couponami',
-                        'language': course_details.get('language'),
-                        'publisher': course_details.get('publisher'),
-                        'rate': course_details.get('rate'),
-                        'enroll': course_details.get('enroll'),
-                        'price': course_details.get('price')
-                    })
-                    logger.debug(f"Added course: {title[:50]}...")
-                    
-                except Exception as e:
-                    logger.warning(f"Error parsing course link: {e}")
+                        # Look for title attribute
+                        title = link.get('title', '') or parent.get('title', '')
+                        if not title or len(title) < 5:
+                            # Try getting text from parent, but clean it up
+                            title = self._text(parent)
+                            if title:
+                                # Remove common non-title text
+                                title = _PRICE_TEXT_RE.sub('', title)  # Remove price
+                                title = _VIEW_COUNT_RE.sub('', title)  # Remove view counts
+                                title = ' '.join(title.split())  # Normalize whitespace
+                
+                # Try the parent's parent if the title or image is still missing
+                if not title or len(title) < 5 or img_elem is None:
+                    if grandparent is not None:
+                        heading, grandparent_img = self._cached_heading_and_img(grandparent, ancestor_lookups)
+                        if (not title or len(title) < 5) and heading is not None:
+                            title = self._text(heading)
+                        if img_elem is None:
+                            img_elem = grandparent_img
+                
+                # Final check - skip if still no valid title
+                if not title or len(title) < 5:
+                    logger.debug(f"Skipping link with no valid title: {course_url[:80]}")
                     continue
-            
-            logger.info(f"Successfully scraped {len(courses)} courses from {url}")
+                
+                # Extract thumbnail
+                thumbnail = None
+                if img_elem is not None:
+                    # Try multiple src attributes
+                    thumbnail = (img_elem.get('src') or 
+                                img_elem.get('data-src') or 
+                                img_elem.get('data-lazy-src') or
+                                img_elem.get('data-original') or
+                                img_elem.get('data-url'))
                     
-        except Exception as e:
-            logger.error(f"Error scraping Couponami: {e}", exc_info=True)
+                    if thumbnail:
+                        # Clean up thumbnail URL
+                        thumbnail = thumbnail.split('?')[0]  # Remove query params
+                        if thumbnail.startswith('/'):
+                            # Handle both couponami.com and discudemy.com
+                            if 'discudemy.com' in COUPONAMI_URL:
+                                thumbnail = "https://www.discudemy.com" + thumbnail
+                            else:
+                                thumbnail = "https://www.couponami.com" + thumbnail
+                        elif not thumbnail.startswith('http'):
+                            if 'discudemy.com' in COUPONAMI_URL:
+                                thumbnail = "https://www.discudemy.com/" + thumbnail
+                            else:
+                                thumbnail = "https://www.couponami.com/" + thumbnail
+                
+                # Course details are fetched by scrape_couponami, all pages at once
+                courses.append({
+                    'title': title,
+                    'coupon_link': course_url,
+                    'thumbnail': thumbnail,
+                    'source': 'couponami',
+                    'language': None,
+                    'publisher': None,
+                    'rate': None,
+                    'enroll': None,
+                    'price': None
+                })
+                logger.debug(f"Added course: {title[:50]}...")
+                
+            except Exception as e:
+                logger.warning(f"Error parsing course link: {e}")
+                continue
         
         return courses
     
-    def get_course_details(self, course_url: str) -> Dict:
+    async def get_course_details(self, course_url: str) -> Dict:
         """Scrape detailed course information from Couponami course page"""
         details = {
             'language': None,
@@ -452,67 +789,13 @@ class UdemyScraper:
             'price': None
         }
         
+        # Other pages (e.g. /go/ redirects) have no details, don't fetch them
+        if not self._has_details_page(course_url):
+            return details
+        
         try:
-            response = requests.get(course_url, headers=self.headers, timeout=self.timeout)
-            response.raise_for_status()
-            # Try lxml parser first, fallback to html.parser if lxml fails
-            try:
-                soup = BeautifulSoup(response.text, 'lxml')
-            except Exception as e:
-                logger.warning(f"lxml parser failed for course details, trying html.parser: {e}")
-                soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find all text that might contain these details
-            page_text = soup.get_text()
-            
-            # Extract Language
-            lang_match = re.search(r'Language\s*:\s*(\w+)', page_text, re.IGNORECASE)
-            if lang_match:
-                details['language'] = lang_match.group(1)
-            
-            # Extract Publisher
-            pub_match = re.search(r'Publisher\s*:\s*([^\n]+)', page_text, re.IGNORECASE)
-            if pub_match:
-                details['publisher'] = pub_match.group(1).strip()
-            
-            # Extract Rate
-            rate_match = re.search(r'Rate\s*:\s*([\d.]+)', page_text, re.IGNORECASE)
-            if rate_match:
-                details['rate'] = rate_match.group(1)
-            
-            # Extract Enroll count
-            enroll_match = re.search(r'Enroll\s*:\s*([\d,]+)', page_text, re.IGNORECASE)
-            if enroll_match:
-                details['enroll'] = enroll_match.group(1)
-            
-            # Extract Price (original -> current)
-            price_match = re.search(r'Price\s*:\s*\$?([\d,]+)\s*->\s*\$?([\d,]+)', page_text, re.IGNORECASE)
-            if price_match:
-                original_price = price_match.group(1)
-                current_price = price_match.group(2)
-                details['price'] = f"${original_price} -> ${current_price}"
-            
-            # Try alternative selectors if regex didn't work
-            if not details['language']:
-                lang_elem = soup.find(string=re.compile(r'Language', re.I))
-                if lang_elem:
-                    parent = lang_elem.parent
-                    if parent:
-                        lang_text = parent.get_text()
-                        match = re.search(r'Language\s*:\s*(\w+)', lang_text, re.I)
-                        if match:
-                            details['language'] = match.group(1)
-            
-            if not details['publisher']:
-                pub_elem = soup.find(string=re.compile(r'Publisher', re.I))
-                if pub_elem:
-                    parent = pub_elem.parent
-                    if parent:
-                        pub_text = parent.get_text()
-                        match = re.search(r'Publisher\s*:\s*([^\n]+)', pub_text, re.I)
-                        if match:
-                            details['publisher'] = match.group(1).strip()
-            
+            page = await self.get_course_page(course_url)
+            details.update((key, page[key]) for key in details if key in page)
             logger.debug(f"Scraped course details: {details}")
             
         except Exception as e:
@@ -520,7 +803,56 @@ class UdemyScraper:
         
         return details
     
-    def get_udemy_course_info(self, coupon_link: str, recursion_depth: int = 0) -> Dict:
+    async def get_course_page(self, course_url: str) -> Dict:
+        """Fetch and parse a course page, for both its details and its link to the course
+        
+        Returns the details found plus 'go_link' and 'udemy_link' (None when missing).
+        """
+        # get_course_details and get_udemy_course_info both read course pages,
+        # caching the parsed page means they only download it once between them
+        cached = self._cache_get(self._page_cache, course_url)
+        if cached is not None:
+            return cached
+        
+        async with self._semaphore:
+            response = await self.client.get(course_url)
+        response.raise_for_status()
+        # Parsing is CPU work, run it in a worker thread so the event loop stays free
+        page = await asyncio.to_thread(self._parse_course_page, response.text)
+        # Failed fetches aren't cached so they are retried next time
+        self._cache_put(self._page_cache, course_url, page)
+        return page
+    
+    def _parse_course_page(self, text: str) -> Dict:
+        """Extract the course details and links found on a course page (runs in a worker thread)"""
+        details = {}
+        tree = self._html(text)
+        
+        # Look for "Get Course" button or similar, and for direct Udemy links
+        get_buttons = _GO_LINKS_XPATH(tree)
+        details['go_link'] = get_buttons[0].get('href') if get_buttons else None
+        udemy_links = _UDEMY_LINKS_XPATH(tree)
+        details['udemy_link'] = udemy_links[0].get('href') if udemy_links else None
+        
+        # Find all text that might contain these details
+        # (one block per line, so a value never runs into the next label)
+        page_text = self._page_text(tree)
+        
+        # Extract Language, Publisher, Rate, Enroll count and Price in a single scan,
+        # keeping the first match of each
+        for match in _COURSE_DETAILS_RE.finditer(page_text):
+            key = match.lastgroup
+            if key in details:
+                continue
+            if key == 'price':
+                # Price is shown as original -> current
+                details['price'] = f"${match.group('original_price')} -> ${match.group('current_price')}"
+            else:
+                details[key] = match.group(key).strip()
+        
+        return details
+    
+    async def get_udemy_course_info(self, coupon_link: str, recursion_depth: int = 0) -> Dict:
         """Follow the coupon link to get the actual Udemy course URL with coupon code"""
         # Prevent infinite recursion
         if recursion_depth > 3:
@@ -530,31 +862,52 @@ class UdemyScraper:
         if not coupon_link or not isinstance(coupon_link, str):
             return {}
         
+        cached = self._cache_get(self._udemy_info_cache, coupon_link)
+        if cached is not None:
+            return cached
+        
+        udemy_info = await self._find_udemy_url(coupon_link, recursion_depth)
+        # Only found URLs are cached, a miss may be a temporary error
+        if udemy_info:
+            self._cache_put(self._udemy_info_cache, coupon_link, udemy_info)
+        return udemy_info
+    
+    async def _find_udemy_url(self, coupon_link: str, recursion_depth: int) -> Dict:
+        """Fetch the coupon link and look for the Udemy course URL (uncached)"""
         try:
-            session = requests.Session()
-            
             # For couponami.com/go/ links, follow redirects to get Udemy URL
             if '/go/' in coupon_link:
                 logger.info(f"Following redirect chain from: {coupon_link}")
                 
-                # Follow redirects with allow_redirects=True to get final URL
-                response = session.get(coupon_link, headers=self.headers, timeout=self.timeout, allow_redirects=True)
+                # Try a HEAD request first, most links redirect straight to Udemy and the
+                # page body isn't needed (the client follows redirects, so this is the final URL)
+                async with self._semaphore:
+                    response = await self.client.head(coupon_link)
+                final_url = str(response.url)
+                if 'udemy.com' in final_url:
+                    logger.info(f"Found Udemy URL: {final_url}")
+                    return {'udemy_url': final_url}
+                
+                # Dead link, no point downloading the page
+                if response.status_code in (404, 410):
+                    logger.warning(f"Coupon link is gone ({response.status_code}): {coupon_link}")
+                    return {}
+                
+                # Not redirected to Udemy (or HEAD isn't supported), get the full page
+                async with self._semaphore:
+                    response = await self.client.get(coupon_link)
                 
                 # Check if final URL is Udemy
-                final_url = response.url
+                final_url = str(response.url)
                 if 'udemy.com' in final_url:
                     logger.info(f"Found Udemy URL: {final_url}")
                     return {'udemy_url': final_url}
                 
                 # If not directly redirected, check the page content
-                try:
-                    soup = BeautifulSoup(response.text, 'lxml')
-                except Exception as e:
-                    logger.warning(f"lxml parser failed, trying html.parser: {e}")
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                tree = await asyncio.to_thread(self._html, response.text)
                 
                 # Look for Udemy links in the page
-                udemy_links = soup.find_all('a', href=re.compile(r'udemy\.com'))
+                udemy_links = _UDEMY_LINKS_XPATH(tree)
                 for link in udemy_links:
                     href = link.get('href', '')
                     if 'udemy.com' in href and 'couponCode=' in href:
@@ -575,63 +928,65 @@ class UdemyScraper:
                         return {'udemy_url': href}
                 
                 # Try to find button or form that contains the link
-                buttons = soup.find_all('button') + soup.find_all('a', class_=re.compile(r'button|btn|get|course'))
+                buttons = list(tree.iter('button')) + [
+                    link for link in tree.iter('a') if _BUTTON_CLASS_RE.search(link.get('class', ''))
+                ]
                 for btn in buttons:
                     onclick = btn.get('onclick', '')
                     if 'udemy.com' in onclick:
                         # Extract URL from onclick
-                        match = re.search(r'https?://[^\s\'"]*udemy\.com[^\s\'"]*', onclick)
+                        match = _ONCLICK_URL_RE.search(onclick)
                         if match:
                             logger.info(f"Found Udemy URL in button: {match.group()}")
                             return {'udemy_url': match.group()}
             
             # For regular couponami course pages (not /go/ links)
             else:
-                response = session.get(coupon_link, headers=self.headers, timeout=self.timeout, allow_redirects=True)
-                try:
-                    soup = BeautifulSoup(response.text, 'lxml')
-                except Exception as e:
-                    logger.warning(f"lxml parser failed, trying html.parser: {e}")
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                # Same cached page get_course_details reads, usually no download needed
+                page = await self.get_course_page(coupon_link)
                 
-                # Look for "Get Course" button or similar
-                get_button = soup.find('a', href=re.compile(r'/go/'))
-                if get_button:
-                    go_link = get_button.get('href', '')
-                    if go_link:
-                        if go_link.startswith('/'):
-                            # Handle both couponami.com and discudemy.com
-                            if 'discudemy.com' in COUPONAMI_URL:
-                                go_link = "https://www.discudemy.com" + go_link
-                            else:
-                                go_link = "https://www.couponami.com" + go_link
-                        # Recursively follow the /go/ link with recursion depth tracking
-                        return self.get_udemy_course_info(go_link, recursion_depth + 1)
+                # Follow the "Get Course" button or similar
+                go_link = page['go_link']
+                if go_link:
+                    if go_link.startswith('/'):
+                        # Handle both couponami.com and discudemy.com
+                        if 'discudemy.com' in COUPONAMI_URL:
+                            go_link = "https://www.discudemy.com" + go_link
+                        else:
+                            go_link = "https://www.couponami.com" + go_link
+                    # Recursively follow the /go/ link with recursion depth tracking
+                    return await self.get_udemy_course_info(go_link, recursion_depth + 1)
                 
-                # Look for direct Udemy links
-                udemy_links = soup.find_all('a', href=re.compile(r'udemy\.com'))
-                for link in udemy_links:
-                    href = link.get('href', '')
-                    if 'udemy.com' in href:
-                        if href.startswith('/'):
-                            href = "https://www.udemy.com" + href
-                        elif not href.startswith('http'):
-                            href = "https://" + href
-                        logger.info(f"Found Udemy URL: {href}")
-                        return {'udemy_url': href}
+                # Otherwise use a direct Udemy link
+                href = page['udemy_link']
+                if href:
+                    if href.startswith('/'):
+                        href = "https://www.udemy.com" + href
+                    elif not href.startswith('http'):
+                        href = "https://" + href
+                    logger.info(f"Found Udemy URL: {href}")
+                    return {'udemy_url': href}
             
             return {}
         except Exception as e:
             logger.warning(f"Could not get Udemy URL from {coupon_link}: {e}")
             return {}
     
-    def scrape_all(self) -> List[Dict]:
+    async def scrape_all(self) -> List[Dict]:
         """Scrape from all available sources"""
         all_courses = []
         
-        # Scrape Couponami (formerly DiscUdemy)
-        couponami_courses = self.scrape_couponami()
-        all_courses.extend(couponami_courses)
+        # Scrape every source concurrently, new sources only need to be added to this list
+        sources = [
+            self.scrape_couponami(),  # Couponami (formerly DiscUdemy)
+        ]
+        results = await asyncio.gather(*sources, return_exceptions=True)
+        for source_courses in results:
+            # One failing source shouldn't lose the courses from the others
+            if isinstance(source_courses, Exception):
+                logger.error(f"Error scraping source: {source_courses}")
+                continue
+            all_courses.extend(source_courses)
         
         logger.info(f"Found {len(all_courses)} free courses")
         return all_courses
@@ -640,12 +995,32 @@ class UdemyScraper:
 # TELEGRAM BOT CLASS
 # ============================================================================
 
+# Course detail lines of a post, in order: (course key, line prefix)
+_DETAIL_LINES = (
+    ('language', "🌐 <b>Language:</b> "),
+    ('publisher', "👤 <b>Publisher:</b> "),
+    ('rate', "⭐ <b>Rate:</b> "),
+    ('enroll', "👥 <b>Enroll:</b> "),
+)
+# Static end of every post
+_MESSAGE_FOOTER = "\n⏰ <i>Limited time offer! Enroll now before it expires.</i>\n\n#DIU #Udemy #FreeCourse"
+
 class TelegramChannelPoster:
     """Handles posting courses to Telegram channel"""
     
-    def __init__(self, bot_token: str, channel_id: str):
-        self.bot = Bot(token=bot_token)
+    def __init__(self, bot_token: str, channel_id: str, concurrency: int = POST_CONCURRENCY,
+                 max_retries: int = POST_MAX_RETRIES):
+        # Enough pooled connections for two batches of concurrent posts (a scheduled run and
+        # a /test command) plus command replies, and a full pool waits for a free connection
+        # The rate limiter keeps every request within Telegram's limits (30 messages a
+        # second overall, 20 a minute per channel) and waits out any RetryAfter
+        self.bot = ExtBot(
+            token=bot_token,
+            request=HTTPXRequest(connection_pool_size=2 * concurrency + 2, pool_timeout=REQUEST_TIMEOUT),
+            rate_limiter=AIORateLimiter(max_retries=max_retries)
+        )
         self.channel_id = channel_id
+        self.concurrency = concurrency
     
     def format_course_message(self, course: Dict) -> str:
         """Format course information as a Telegram message"""
@@ -656,36 +1031,19 @@ class TelegramChannelPoster:
         # Escape HTML entities in title to prevent parsing issues
         title = html.escape(str(title))
         
-        # Course details
-        language = course.get('language')
-        publisher = course.get('publisher')
-        rate = course.get('rate')
-        enroll = course.get('enroll')
-        
-        message = f"🎓 <b>{title}</b>\n\n"
-        
-        # Course details section - only show if available
-        message += "📋 <b>Course Details:</b>\n"
-        if language:
-            message += f"🌐 <b>Language:</b> {html.escape(str(language))}\n"
-        if publisher:
-            message += f"👤 <b>Publisher:</b> {html.escape(str(publisher))}\n"
-        if rate:
-            message += f"⭐ <b>Rate:</b> {html.escape(str(rate))}\n"
-        if enroll:
-            message += f"👥 <b>Enroll:</b> {html.escape(str(enroll))}\n"
-        
-        message += "\n"
-        
-        if udemy_url:
-            message += f"🔗 <b>Get Course:</b> {udemy_url}\n"
-        else:
-            message += f"🔗 <b>Get Course:</b> {coupon_link}\n"
-        
-        message += "\n⏰ <i>Limited time offer! Enroll now before it expires.</i>\n"
-        message += "\n#DIU #Udemy #FreeCourse"
+        # Course details section - only show the lines that are available
+        details = ''.join(
+            f"{label}{html.escape(str(value))}\n"
+            for key, label in _DETAIL_LINES
+            if (value := course.get(key))
+        )
         
-        return message
+        return (
+            f"🎓 <b>{title}</b>\n\n"
+            f"📋 <b>Course Details:</b>\n{details}\n"
+            f"🔗 <b>Get Course:</b> {udemy_url or coupon_link}\n"
+            + _MESSAGE_FOOTER
+        )
     
     async def post_course(self, course: Dict) -> bool:
         """Post a course to the Telegram channel"""
@@ -723,6 +1081,17 @@ class TelegramChannelPoster:
             logger.error(f"Unexpected error posting course: {e}")
             return False
     
+    async def post_courses(self, courses: List[Dict]) -> List[bool]:
+        """Post several courses concurrently, returns whether each one was posted"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def post(course: Dict) -> bool:
+            # The bot's rate limiter paces the posts, no need to sleep between them
+            async with semaphore:
+                return await self.post_course(course)
+        
+        return await asyncio.gather(*(post(course) for course in courses))
+    
     async def test_connection(self) -> bool:
         """Test if bot can send messages to the channel"""
         try:
@@ -742,32 +1111,78 @@ class TelegramChannelPoster:
 # MAIN BOT CLASS
 # ============================================================================
 
+# Explanation logged at the start of every run, built once as a single log message
+_PROCESS_BANNER = "\n".join((
+    "=" * 60,
+    "HOW DUPLICATE DETECTION WORKS:",
+    "1. Bot scrapes courses from https://www.couponami.com/all",
+    "2. For each course, checks database using coupon_link",
+    "3. Also checks by Udemy course slug (even if coupon link differs)",
+    "4. Only NEW courses (not in database) are posted",
+    "5. Each posted course is saved to database to prevent future duplicates",
+    "=" * 60,
+))
+
 class UdemyCoursesBot:
     """Main bot class that orchestrates scraping and posting"""
     
     def __init__(self):
-        self.scraper = UdemyScraper(timeout=REQUEST_TIMEOUT)
         self.db = CourseDatabase(db_path=DB_PATH)
+        # is_coupon_posted is a lock-free set lookup, safe to call on the event loop
+        self.scraper = UdemyScraper(timeout=REQUEST_TIMEOUT, is_known=self.db.is_coupon_posted)
         self.telegram = TelegramChannelPoster(TELEGRAM_BOT_TOKEN, TELEGRAM_CHANNEL_ID)
         self.scheduler = AsyncIOScheduler()
         self.application = None
+        # Last scrape result and when it was made (time.monotonic), see _scrape
+        self._last_scrape = (0.0, [])
+    
+    async def _scrape(self) -> List[Dict]:
+        """Scrape all sources, or reuse the last result if it is recent enough"""
+        scraped_at, courses = self._last_scrape
+        if not courses or time.monotonic() - scraped_at >= SCRAPE_REUSE_SECONDS:
+            courses = await self.scraper.scrape_all()
+            self._last_scrape = (time.monotonic(), courses)
+        else:
+            logger.info(f"Reusing the courses scraped {time.monotonic() - scraped_at:.0f}s ago")
+        # Copies, callers fill in and change the course dicts
+        return [dict(course) for course in courses]
+    
+    async def _enrich_course(self, course: Dict):
+        """Fill in a course's missing details and Udemy URL before posting it"""
+        coupon_link = course.get('coupon_link', '')
+        course_title = course.get('title', 'Unknown')
+        if not coupon_link:
+            return
+        
+        # Get course details if missing (/go/ links have no course page)
+        if not course.get('language') and '/go/' not in coupon_link:
+            try:
+                logger.debug(f"📋 Getting details for: {course_title[:50]}...")
+                course_details = await self.scraper.get_course_details(coupon_link)
+                for key in ('language', 'publisher', 'rate', 'enroll'):
+                    if course_details.get(key):
+                        course[key] = course_details[key]
+            except Exception as e:
+                logger.warning(f"Could not get course details for '{course_title[:50]}...': {e}")
+        
+        # Get Udemy course URL if missing (from the same course page, it is only downloaded once)
+        if not course.get('udemy_url'):
+            try:
+                udemy_info = await self.scraper.get_udemy_course_info(coupon_link)
+                if udemy_info.get('udemy_url'):
+                    course['udemy_url'] = udemy_info['udemy_url']
+            except Exception as e:
+                logger.warning(f"Could not get Udemy URL for '{course_title[:50]}...': {e}")
     
     async def process_courses(self):
-        """Fetch new courses and post them to Telegram one by one"""
+        """Fetch new courses and post them to Telegram, a few at a time (they may arrive out of order)"""
         logger.info("Starting course scraping and posting process...")
-        logger.info("=" * 60)
-        logger.info("HOW DUPLICATE DETECTION WORKS:")
-        logger.info("1. Bot scrapes courses from https://www.couponami.com/all")
-        logger.info("2. For each course, checks database using coupon_link")
-        logger.info("3. Also checks by Udemy course slug (even if coupon link differs)")
-        logger.info("4. Only NEW courses (not in database) are posted")
-        logger.info("5. Each posted course is saved to database to prevent future duplicates")
-        logger.info("=" * 60)
+        logger.info(_PROCESS_BANNER)
         
         try:
             # Scrape free courses from couponami.com/all
             logger.info(f"🔍 Scraping {COUPONAMI_URL} for new courses...")
-            courses = self.scraper.scrape_all()
+            courses = await self._scrape()
             
             if not courses:
                 logger.warning("❌ No courses found during scraping")
@@ -779,23 +1194,37 @@ class UdemyCoursesBot:
             new_courses = []
             duplicate_count = 0
             
-            for course in courses:
-                coupon_link = course.get('coupon_link', '')
+            # First pass: the cheap checks (by coupon_link, or course_title for courses without
+            # a link), most scraped courses were posted before and need no HTTP request at all
+            candidates = []
+            posted_indexes = await asyncio.to_thread(self.db.filter_already_posted, courses)
+            for index, course in enumerate(courses):
+                if index in posted_indexes:
+                    duplicate_count += 1
+                    logger.info(f"⏭️  SKIPPED (duplicate): {course.get('title', '')[:50]}...")
+                else:
+                    candidates.append(course)
+            
+            # Then get the Udemy URLs of the remaining ones to check for duplicates more accurately
+            # (for all of them at once, the scraper caps how many requests run in parallel)
+            udemy_infos = await asyncio.gather(
+                *(self.scraper.get_udemy_course_info(course.get('coupon_link', '')) for course in candidates),
+                return_exceptions=True
+            )
+            
+            for course, udemy_info in zip(candidates, udemy_infos):
+                if isinstance(udemy_info, Exception):
+                    logger.warning(f"Could not get Udemy URL for duplicate check: {udemy_info}")
+                elif udemy_info.get('udemy_url'):
+                    course['udemy_url'] = udemy_info['udemy_url']
+            
+            # Second pass: check them again, now also by udemy_url
+            posted_indexes = await asyncio.to_thread(self.db.filter_already_posted, candidates)
+            
+            for index, course in enumerate(candidates):
                 course_title = course.get('title', '')
                 
-                # First, try to get Udemy URL to check for duplicates more accurately
-                udemy_url = None
-                if coupon_link:
-                    try:
-                        udemy_info = self.scraper.get_udemy_course_info(coupon_link)
-                        if udemy_info.get('udemy_url'):
-                            udemy_url = udemy_info['udemy_url']
-                            course['udemy_url'] = udemy_url
-                    except Exception as e:
-                        logger.warning(f"Could not get Udemy URL for duplicate check: {e}")
-                
-                # Check if already posted (by coupon_link, udemy_url, or course_title)
-                if self.db.is_posted(coupon_link, udemy_url, course_title):
+                if index in posted_indexes:
                     duplicate_count += 1
                     logger.info(f"⏭️  SKIPPED (duplicate): {course_title[:50]}...")
                     continue
@@ -804,63 +1233,47 @@ class UdemyCoursesBot:
                 new_courses.append(course)
                 logger.info(f"✨ NEW course detected: {course.get('title', 'Unknown')[:50]}...")
             
+            # Only the new courses are needed from here on, drop the duplicates while posting
+            scraped_count = len(courses)
+            del courses, candidates, udemy_infos
+            
             logger.info(f"📊 Summary: {len(new_courses)} new courses, {duplicate_count} duplicates skipped")
             
             if not new_courses:
                 logger.info("✅ No new courses to post. All courses already posted.")
                 return
             
-            # Post new courses one by one
+            # Post new courses, a few at a time
             posted_count = 0
             failed_count = 0
+            posted_courses = []
             
-            for course in new_courses:
-                coupon_link = course.get('coupon_link', '')
-                course_title = course.get('title', 'Unknown')
+            try:
+                # Fill in anything the scrape and the duplicate check didn't get, all courses at once
+                await asyncio.gather(*(self._enrich_course(course) for course in new_courses))
                 
-                try:
-                    # Get course details if missing (for /go/ links, get from the course page)
-                    if not course.get('language') and '/go/' not in coupon_link:
-                        logger.debug(f"📋 Getting details for: {course_title[:50]}...")
-                        course_details = self.scraper.get_course_details(coupon_link)
-                        if course_details.get('language'):
-                            course['language'] = course_details.get('language')
-                        if course_details.get('publisher'):
-                            course['publisher'] = course_details.get('publisher')
-                        if course_details.get('rate'):
-                            course['rate'] = course_details.get('rate')
-                        if course_details.get('enroll'):
-                            course['enroll'] = course_details.get('enroll')
-                    
-                    # Post to Telegram channel
-                    logger.info(f"📤 Posting to channel: {course_title[:50]}...")
-                    success = await self.telegram.post_course(course)
-                    
+                # Post to Telegram channel
+                logger.info(f"📤 Posting {len(new_courses)} courses to channel...")
+                results = await self.telegram.post_courses(new_courses)
+                
+                for course, success in zip(new_courses, results):
+                    course_title = course.get('title', 'Unknown')
                     if success:
-                        # Mark as posted in database (this prevents future duplicates)
-                        self.db.mark_posted(
-                            course_title=course_title,
-                            coupon_link=coupon_link,
-                            udemy_url=course.get('udemy_url'),
-                            source=course.get('source')
-                        )
+                        # Queue for the database (this prevents future duplicates)
+                        posted_courses.append(course)
                         posted_count += 1
                         logger.info(f"✅ Posted #{posted_count}: {course_title[:50]}...")
-                        
-                        # Add delay between posts to avoid rate limiting
-                        await asyncio.sleep(2)
                     else:
                         failed_count += 1
                         logger.error(f"❌ Failed to post: {course_title[:50]}...")
-                        
-                except Exception as e:
-                    failed_count += 1
-                    logger.error(f"❌ Error posting course '{course_title[:50]}...': {e}", exc_info=True)
-                    continue
+                
+            finally:
+                # Record every successful post in one transaction
+                await asyncio.to_thread(self.db.mark_posted_many, posted_courses)
             
             logger.info("=" * 60)
             logger.info(f"📊 FINAL SUMMARY:")
-            logger.info(f"   Total scraped: {len(courses)}")
+            logger.info(f"   Total scraped: {scraped_count}")
             logger.info(f"   Duplicates skipped: {duplicate_count}")
             logger.info(f"   New courses found: {len(new_courses)}")
             logger.info(f"   Successfully posted: {posted_count}")
@@ -895,9 +1308,9 @@ class UdemyCoursesBot:
             
             logger.info(f"Scraping for {num_courses} courses...")
             
-            # Scrape fresh courses from couponami.com/all
+            # Scrape courses from couponami.com/all (reusing a scrape up to SCRAPE_REUSE_SECONDS old)
             try:
-                courses = self.scraper.scrape_all()
+                courses = await self._scrape()
             except Exception as e:
                 logger.error(f"Error scraping courses: {e}", exc_info=True)
                 return
@@ -920,72 +1333,34 @@ class UdemyCoursesBot:
             
             logger.info(f"Posting {len(courses_to_post)} courses to channel...")
             
-            # Post each course to the channel silently (no status messages)
-            posted_count = 0
-            for idx, course in enumerate(courses_to_post, 1):
-                try:
-                    coupon_link = course.get('coupon_link', '')
-                    course_title = course.get('title', 'Unknown')
-                    
-                    logger.info(f"[{idx}/{len(courses_to_post)}] Processing: {course_title[:50]}...")
-                    
-                    # Get course details if missing
-                    if not course.get('language') and '/go/' not in coupon_link:
-                        try:
-                            course_details = self.scraper.get_course_details(coupon_link)
-                            if course_details.get('language'):
-                                course['language'] = course_details.get('language')
-                            if course_details.get('publisher'):
-                                course['publisher'] = course_details.get('publisher')
-                            if course_details.get('rate'):
-                                course['rate'] = course_details.get('rate')
-                            if course_details.get('enroll'):
-                                course['enroll'] = course_details.get('enroll')
-                        except Exception as e:
-                            logger.warning(f"Could not get course details: {e}")
-                    
-                    # Get Udemy course URL (only once, before posting)
-                    if coupon_link:
-                        if not course.get('udemy_url'):
-                            try:
-                                udemy_info = self.scraper.get_udemy_course_info(coupon_link)
-                                if udemy_info.get('udemy_url'):
-                                    course['udemy_url'] = udemy_info['udemy_url']
-                            except Exception as e:
-                                logger.warning(f"Could not get Udemy URL: {e}")
-                    
-                    # Post to channel
-                    success = await self.telegram.post_course(course)
-                    if success:
-                        # Only mark as posted if not already in database (avoid unnecessary DB writes)
-                        # But don't skip posting - /test allows reposting
-                        if coupon_link and not self.db.is_posted(coupon_link):
-                            self.db.mark_posted(
-                                course_title=course_title,
-                                coupon_link=coupon_link,
-                                udemy_url=course.get('udemy_url'),
-                                source=course.get('source')
-                            )
-                        posted_count += 1
-                        logger.info(f"✅ Posted [{posted_count}/{len(courses_to_post)}]: {course_title[:50]}...")
-                    else:
-                        logger.error(f"❌ Failed to post: {course_title[:50]}...")
-                    
-                    # Delay between posts
-                    if idx < len(courses_to_post):
-                        await asyncio.sleep(2)
-                        
-                except Exception as e:
-                    logger.error(f"Error processing course: {e}", exc_info=True)
-                    continue
+            # Get the details and Udemy URLs of all the courses at once, then post them
+            # to the channel silently (no status messages)
+            await asyncio.gather(*(self._enrich_course(course) for course in courses_to_post))
+            
+            # Post to channel
+            results = await self.telegram.post_courses(courses_to_post)
             
+            posted_count = 0
+            posted_courses = []
+            for course, success in zip(courses_to_post, results):
+                course_title = course.get('title', 'Unknown')
+                if success:
+                    # Courses already in the database are skipped by the batch insert
+                    # But don't skip posting - /test allows reposting
+                    posted_courses.append(course)
+                    posted_count += 1
+                    logger.info(f"✅ Posted [{posted_count}/{len(courses_to_post)}]: {course_title[:50]}...")
+                else:
+                    logger.error(f"❌ Failed to post: {course_title[:50]}...")
+            
+            await asyncio.to_thread(self.db.mark_posted_many, posted_courses)
             logger.info(f"/test command completed - posted {posted_count}/{len(courses_to_post)} courses")
             
         except Exception as e:
             logger.error(f"Error handling /test command: {e}", exc_info=True)
     
     async def handle_test_scrape_command(self, update, context: ContextTypes.DEFAULT_TYPE):
-        """Handle /test_scrape command - scrape and post 1 fresh course to test functionality"""
+        """Handle /test_scrape command - scrape (or reuse a recent scrape) and post 1 course to test functionality"""
         logger.info("/test_scrape command received")
         
         try:
@@ -1001,8 +1376,8 @@ class UdemyCoursesBot:
                 text="🔍 Scraping for a free course to test..."
             )
             
-            # Scrape fresh courses
-            courses = self.scraper.scrape_all()
+            # Scrape courses, reusing a scrape up to SCRAPE_REUSE_SECONDS old
+            courses = await self._scrape()
             
             if not courses:
                 await status_msg.edit_text("❌ No free courses found. Please try again later.")
@@ -1012,11 +1387,10 @@ class UdemyCoursesBot:
             # Take the first course
             test_course = courses[0]
             
-            # Try to get Udemy course URL
-            logger.info(f"Getting Udemy URL for test course: {test_course.get('title', 'Unknown')}")
-            udemy_info = self.scraper.get_udemy_course_info(test_course.get('coupon_link', ''))
-            if udemy_info.get('udemy_url'):
-                test_course['udemy_url'] = udemy_info['udemy_url']
+            # Get the course details and Udemy course URL (the scrape skips details for
+            # courses posted before, and the first course usually is one)
+            logger.info(f"Getting details and Udemy URL for test course: {test_course.get('title', 'Unknown')}")
+            await self._enrich_course(test_course)
             
             # Show course details for verification
             course_info = f"📝 Course Details:\n"
@@ -1033,7 +1407,8 @@ class UdemyCoursesBot:
             
             if success:
                 # Mark as posted
-                self.db.mark_posted(
+                await asyncio.to_thread(
+                    self.db.mark_posted,
                     course_title=test_course.get('title', ''),
                     coupon_link=test_course.get('coupon_link', ''),
                     udemy_url=test_course.get('udemy_url'),
@@ -1113,50 +1488,70 @@ class UdemyCoursesBot:
         logger.info("Starting Udemy Free Courses Bot...")
         
         # Set up Telegram Application for command handling
-        self.application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+        # (sharing the poster's bot, so commands and channel posts use one rate limiter)
+        self.application = Application.builder().bot(self.telegram.bot).build()
         
         # Add command handlers
         self.application.add_handler(CommandHandler("test", self.handle_test_command))
         self.application.add_handler(CommandHandler("test_scrape", self.handle_test_scrape_command))
         self.application.add_handler(CommandHandler("test_sample", self.handle_test_sample_command))
         
-        # Start polling for commands
-        await self.application.initialize()
-        await self.application.start()
-        await self.application.updater.start_polling()
-        
-        # Test Telegram connection
-        logger.info("Testing Telegram connection...")
-        if not await self.telegram.test_connection():
-            logger.error("Failed to connect to Telegram. Please check your bot token and channel ID.")
-            sys.exit(1)
-        
-        # Run immediately once
-        await self.process_courses()
-        
-        # Schedule recurring runs every 5 minutes
-        self.scheduler.add_job(
-            self.process_courses,
-            trigger=IntervalTrigger(minutes=SCRAPE_INTERVAL_MINUTES),
-            id='scrape_and_post',
-            replace_existing=True
-        )
-        
-        self.scheduler.start()
-        logger.info(f"Bot started. Will check for new courses every {SCRAPE_INTERVAL_MINUTES} minutes from {COUPONAMI_URL}.")
-        logger.info("Bot is now listening for /test commands.")
-        logger.info("Press Ctrl+C to stop the bot.")
-        
+        # Start receiving commands
         try:
-            # Keep the script running
-            while True:
-                await asyncio.sleep(1)
-        except KeyboardInterrupt:
+            await self.application.initialize()
+            await self.application.start()
+            if WEBHOOK_URL:
+                # Telegram pushes each command to us, nothing runs while the bot is idle
+                # (the token in the path keeps the endpoint private)
+                await self.application.updater.start_webhook(
+                    listen='0.0.0.0',
+                    port=WEBHOOK_PORT,
+                    url_path=TELEGRAM_BOT_TOKEN,
+                    webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{TELEGRAM_BOT_TOKEN}"
+                )
+            else:
+                # Long polling, each request waits up to 30 seconds for a new command
+                await self.application.updater.start_polling(timeout=30)
+            
+            # Test Telegram connection
+            logger.info("Testing Telegram connection...")
+            if not await self.telegram.test_connection():
+                logger.error("Failed to connect to Telegram. Please check your bot token and channel ID.")
+                sys.exit(1)
+            
+            # Run immediately once
+            await self.process_courses()
+            
+            # Schedule recurring runs every 5 minutes
+            self.scheduler.add_job(
+                self.process_courses,
+                trigger=IntervalTrigger(minutes=SCRAPE_INTERVAL_MINUTES),
+                id='scrape_and_post',
+                replace_existing=True
+            )
+            
+            self.scheduler.start()
+            logger.info(f"Bot started. Will check for new courses every {SCRAPE_INTERVAL_MINUTES} minutes from {COUPONAMI_URL}.")
+            logger.info("Bot is now listening for /test commands.")
+            logger.info("Press Ctrl+C to stop the bot.")
+            
+            # Keep the script running, without waking up until it is stopped
+            await asyncio.Event().wait()
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            # On Python 3.11+ asyncio.run() turns Ctrl+C into a cancellation of this task
             logger.info("Stopping bot...")
-            await self.application.updater.stop()
-            await self.application.stop()
+        finally:
+            # Also runs after a failed connection test or startup error, so only stop what started
+            if self.application.updater.running:
+                await self.application.updater.stop()
+            if self.application.running:
+                await self.application.stop()
             await self.application.shutdown()
-            self.scheduler.shutdown()
+            if self.scheduler.running:
+                self.scheduler.shutdown()
+            # Close the pooled HTTP clients (shutting down the application closed the bot's)
+            await self.scraper.aclose()
+            self.db.close()
             logger.info("Bot stopped.")
 
 # ============================================================================